@@ -0,0 +1,138 @@
+import csv
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from heredity import METHODS, read_people
+
+# Column naming each family's rows in a concatenated CSV
+FAMILY = "family"
+
+# Output columns, one row per person
+FIELDS = ["family", "person", "gene_2", "gene_1", "gene_0", "trait_true", "trait_false"]
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python batch.py (directory|families.csv) output.(csv|parquet) [" + "|".join(METHODS) + "]")
+    source, output = sys.argv[1], sys.argv[2]
+    method = sys.argv[3] if len(sys.argv) == 4 else "elimination"
+    if method not in METHODS:
+        sys.exit(f"Unknown method {method}")
+
+    families = read_directory(source) if os.path.isdir(source) else read_families(source)
+    rows = run(families, method)
+    if output.endswith(".parquet"):
+        count = write_parquet(output, rows)
+    else:
+        count = write_csv(output, rows)
+    print(f"Wrote {count} rows to {output}")
+
+
+def read_directory(directory):
+    """
+    Yield (family, people) for each CSV file in `directory`, in name order,
+    using the file name without its extension as the family id.
+    """
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith(".csv"):
+            with open(entry.path) as f:
+                yield os.path.splitext(entry.name)[0], read_people(csv.DictReader(f))
+
+
+def read_families(filename):
+    """
+    Yield (family, people) for each family in a concatenated CSV with a
+    `family` column next to name, mother, father and trait. Each family's
+    rows must be contiguous; only one family is held in memory at a time.
+    """
+    with open(filename) as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or FAMILY not in reader.fieldnames:
+            raise ValueError(f"{filename} has no {FAMILY} column")
+        for family, rows in itertools.groupby(reader, key=lambda row: row[FAMILY]):
+            yield family, read_people(rows)
+
+
+def infer(families, method):
+    """
+    Return output rows for a list of (family, people) pairs.
+    """
+    rows = []
+    for family, people in families:
+        probabilities = METHODS[method](people)
+        for person in people:
+            gene = probabilities[person]["gene"]
+            trait = probabilities[person]["trait"]
+            rows.append((family, person, gene[2], gene[1], gene[0], trait[True], trait[False]))
+    return rows
+
+
+def run(families, method="elimination", workers=None, chunk_size=64):
+    """
+    Yield output rows for every family in `families`, in input order.
+
+    Families are sent to a process pool `chunk_size` at a time so that
+    small families do not pay a round trip each, and only a few chunks per
+    worker are in flight so that `families` is read lazily. Each worker
+    imports heredity once, so the PROBS tables are built once per process.
+    """
+    families = iter(families)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        while True:
+            chunk = list(itertools.islice(families, chunk_size))
+            if chunk:
+                pending.append(executor.submit(infer, chunk, method))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                yield from pending.popleft().result()
+            elif not chunk:
+                break
+
+
+def write_csv(filename, rows):
+    """
+    Write `rows` to a CSV file and return how many were written.
+    """
+    count = 0
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(filename, rows, batch_size=65536):
+    """
+    Write `rows` to a Parquet file `batch_size` rows at a time and return
+    how many were written. Requires pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet output requires pyarrow; write a .csv file instead")
+
+    schema = pa.schema(
+        [("family", pa.string()), ("person", pa.string())] +
+        [(field, pa.float64()) for field in FIELDS[2:]]
+    )
+    count = 0
+    rows = iter(rows)
+    with pq.ParquetWriter(filename, schema) as writer:
+        while batch := list(itertools.islice(rows, batch_size)):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays([list(column) for column in columns], schema=schema))
+            count += len(batch)
+    return count
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import csv
-import itertools
+import graphlib
+import heapq
+import math
 import sys
+import warnings
+
+import numpy as np
 
 PROBS = {
 
@@ -37,52 +42,89 @@ PROBS = {
 }
 
 
-def main():
+def gene_table(probs=PROBS):
+    """
+    Return an array whose entry [g] is the unconditional probability of
+    having `g` copies of the gene.
+    """
+    return np.array([probs["gene"][genes] for genes in range(3)])
 
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
-            }
-        }
-        for person in people
-    }
+def trait_table(probs=PROBS):
+    """
+    Return a 3x2 array whose entry [g, t] is the probability of having the
+    trait (t = 1) or not (t = 0) given `g` copies of the gene.
+    """
+    return np.array([[probs["trait"][genes][False], probs["trait"][genes][True]] for genes in range(3)])
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+def inheritance_table(probs=PROBS):
+    """
+    Return a 3x3x3 array whose entry [m, f, c] is the probability that a
+    child has `c` copies of the gene given that the mother has `m` copies
+    and the father `f`.
+    """
+    mutation = probs["mutation"]
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    # Probability that a parent with 0, 1 or 2 copies passes the gene on
+    passing = np.array([mutation, 0.5, 1 - mutation])
+    mother = passing[:, np.newaxis]
+    father = passing[np.newaxis, :]
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    table = np.empty((3, 3, 3))
+    table[:, :, 0] = (1 - mother) * (1 - father)
+    table[:, :, 1] = mother * (1 - father) + (1 - mother) * father
+    table[:, :, 2] = mother * father
+    return table
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+
+# Probability tables built once from PROBS
+GENE = gene_table()
+TRAIT = trait_table()
+INHERITANCE = inheritance_table()
+
+
+def probability_tables(probs=PROBS):
+    """
+    Return the (gene, trait, inheritance) tables for `probs`, reusing the
+    ones built at import time when `probs` is PROBS.
+    """
+    if probs is PROBS:
+        return GENE, TRAIT, INHERITANCE
+    return gene_table(probs), trait_table(probs), inheritance_table(probs)
+
+
+class SamplingWarning(RuntimeWarning):
+    """
+    Warns that a sampler's estimates and standard errors are unreliable.
+    """
+
+
+def main():
+
+    # Check for proper usage
+    methods = list(METHODS) + list(SAMPLERS)
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python heredity.py data.csv [" + "|".join(methods) + "]")
+    people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "elimination"
+    if method not in methods:
+        sys.exit(f"Unknown method {method}")
+
+    # Compute gene and trait probabilities for each person, with standard
+    # errors when they are estimated by sampling
+    if method in SAMPLERS:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", SamplingWarning)
+            probabilities, errors = SAMPLERS[method](people)
+        for warning in caught:
+            if issubclass(warning.category, SamplingWarning) and method != "gibbs":
+                print(f"{warning.message}; falling back to Gibbs sampling", file=sys.stderr)
+                probabilities, errors = SAMPLERS["gibbs"](people)
+                break
+            warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
+    else:
+        probabilities, errors = METHODS[method](people), None
 
     # Print results
     for person in people:
@@ -91,7 +133,107 @@ def main():
             print(f"  {field.capitalize()}:")
             for value in probabilities[person][field]:
                 p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    print(f"    {value}: {p:.4f} ± {errors[person][field][value]:.4f}")
+
+
+def enumerate_probabilities(people, probs=PROBS):
+    """
+    Return gene and trait probabilities for each person by summing the
+    joint probability of every possible assignment of genes and traits.
+    """
+    order = topological_order(people)
+
+    # Keep track of gene and trait probabilities for each person, indexed
+    # by their position in `order`
+    gene_totals = [[0, 0, 0] for _ in order]
+    trait_totals = [[0, 0] for _ in order]
+
+    for one_gene, two_genes, have_trait, p in assignments(people, order, probs):
+        for i in range(len(order)):
+            genes = 2 if two_genes >> i & 1 else one_gene >> i & 1
+            gene_totals[i][genes] += p
+            trait_totals[i][have_trait >> i & 1] += p
+
+    probabilities = {
+        person: {
+            "gene": {genes: gene_totals[i][genes] for genes in (2, 1, 0)},
+            "trait": {True: trait_totals[i][1], False: trait_totals[i][0]}
+        }
+        for i, person in enumerate(order)
+    }
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return {person: probabilities[person] for person in people}
+
+
+def assignments(people, order, probs=PROBS):
+    """
+    Yield (one_gene, two_genes, have_trait, p) for every assignment of
+    genes and traits that agrees with the known traits and has nonzero
+    joint probability `p`. The first three are bitmasks in which bit `i`
+    stands for the person at position `i` of `order`, which must list
+    parents before their children.
+
+    People are assigned one at a time, depth first, carrying the product
+    of their probabilities so far. Branches that contradict the evidence
+    are never generated and zero-probability branches are cut as soon as
+    they appear, and the stack holds at most six entries per person.
+    """
+    gene, trait, table = probability_tables(probs)
+    position = {person: i for i, person in enumerate(order)}
+    parents = [
+        None if people[person]["mother"] is None
+        else (position[people[person]["mother"]], position[people[person]["father"]])
+        for person in order
+    ]
+    evidence = [
+        (False, True) if people[person]["trait"] is None else (people[person]["trait"],)
+        for person in order
+    ]
+
+    stack = [(0, 0, 0, 0, 1.0)]
+    while stack:
+        i, one_gene, two_genes, have_trait, p = stack.pop()
+        if i == len(order):
+            yield one_gene, two_genes, have_trait, p
+            continue
+
+        bit = 1 << i
+        if parents[i] is None:
+            p_genes = gene
+        else:
+            mother, father = parents[i]
+            p_genes = table[
+                2 if two_genes >> mother & 1 else one_gene >> mother & 1,
+                2 if two_genes >> father & 1 else one_gene >> father & 1
+            ]
+        for genes in (0, 1, 2):
+            for has_trait in evidence[i]:
+                p_next = p * p_genes[genes] * trait[genes, int(has_trait)]
+                if p_next == 0:
+                    continue
+                stack.append((
+                    i + 1,
+                    one_gene | bit if genes == 1 else one_gene,
+                    two_genes | bit if genes == 2 else two_genes,
+                    have_trait | bit if has_trait else have_trait,
+                    float(p_next)
+                ))
+
+
+def topological_order(people):
+    """
+    Return the names in `people` ordered so that parents come before their
+    children.
+    """
+    return list(graphlib.TopologicalSorter({
+        person: [parent for parent in (people[person]["mother"], people[person]["father"]) if parent is not None]
+        for person in people
+    }).static_order())
 
 
 def load_data(filename):
@@ -101,31 +243,27 @@ def load_data(filename):
     mother, father must both be blank, or both be valid names in the CSV.
     trait should be 0 or 1 if trait is known, blank otherwise.
     """
-    data = dict()
     with open(filename) as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row["name"]
-            data[name] = {
-                "name": name,
-                "mother": row["mother"] or None,
-                "father": row["father"] or None,
-                "trait": (True if row["trait"] == "1" else
-                          False if row["trait"] == "0" else None)
-            }
-    return data
+        return read_people(csv.DictReader(f))
 
 
-def powerset(s):
+def read_people(rows):
     """
-    Return a list of all possible subsets of set s.
+    Return a dictionary of gene and trait data from an iterable of CSV
+    rows, each a dict with fields name, mother, father, trait as described
+    in `load_data`.
     """
-    s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    data = dict()
+    for row in rows:
+        name = row["name"]
+        data[name] = {
+            "name": name,
+            "mother": row["mother"] or None,
+            "father": row["father"] or None,
+            "trait": (True if row["trait"] == "1" else
+                      False if row["trait"] == "0" else None)
+        }
+    return data
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -157,80 +295,91 @@ def joint_probability(people, one_gene, two_genes, have_trait):
 
         # Get probability of gene
         if mother is None and father is None:
-            p_gene = PROBS["gene"][genes]
+            p_gene = GENE[genes]
         else:
             # Get number of genes from parents
             n_genes_mother = 2 if mother in two_genes else 1 if mother in one_gene else 0
             n_genes_father = 2 if father in two_genes else 1 if father in one_gene else 0
-
-            # Calculate probability of gene
-            if genes == 0:
-                if n_genes_mother == 0 and n_genes_father == 0:
-                    p_gene = (1 - PROBS["mutation"]) * (1 - PROBS["mutation"])
-                elif (n_genes_mother == 0 and n_genes_father == 1) or (n_genes_mother == 1 and n_genes_father == 0):
-                    p_gene = (1 - PROBS["mutation"]) * 0.5
-                elif n_genes_mother == 1 and n_genes_father == 1:
-                    p_gene = 0.5 * 0.5
-                elif (n_genes_mother == 0 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 0):
-                    p_gene = (1 - PROBS["mutation"]) * PROBS["mutation"]
-                elif (n_genes_mother == 1 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 1):
-                    p_gene = 0.5 * PROBS["mutation"]
-                elif n_genes_mother == 2 and n_genes_father == 2:
-                    p_gene = PROBS["mutation"] * PROBS["mutation"]
-            elif genes == 1:
-                if n_genes_mother == 0 and n_genes_father == 0:
-                    p_gene = (1 - PROBS["mutation"]) * PROBS["mutation"] + PROBS["mutation"] * (1 - PROBS["mutation"])
-                elif (n_genes_mother == 0 and n_genes_father == 1) or (n_genes_mother == 1 and n_genes_father == 0):
-                    p_gene = 0.5 * (1 - PROBS["mutation"]) + 0.5 * PROBS["mutation"]
-                elif n_genes_mother == 1 and n_genes_father == 1:
-                    p_gene = 0.5 * 0.5 + 0.5 * 0.5
-                elif (n_genes_mother == 0 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 0):
-                    p_gene = (1 - PROBS["mutation"]) * PROBS["mutation"] + PROBS["mutation"] * (1 - PROBS["mutation"])
-                elif (n_genes_mother == 1 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 1):
-                    p_gene = 0.5 * PROBS["mutation"] + 0.5 * (1 - PROBS["mutation"])
-                elif n_genes_mother == 2 and n_genes_father == 2:
-                    p_gene = PROBS["mutation"] * (1 - PROBS["mutation"]) + (1 - PROBS["mutation"]) * PROBS["mutation"]
-            elif genes == 2:
-                if n_genes_mother == 0 and n_genes_father == 0:
-                    p_gene = PROBS["mutation"] * PROBS["mutation"]
-                elif (n_genes_mother == 0 and n_genes_father == 1) or (n_genes_mother == 1 and n_genes_father == 0):
-                    p_gene = 0.5 * PROBS["mutation"]
-                elif n_genes_mother == 1 and n_genes_father == 1:
-                    p_gene = 0.5 * 0.5
-                elif (n_genes_mother == 0 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 0):
-                    p_gene = PROBS["mutation"] * (1 - PROBS["mutation"])
-                elif (n_genes_mother == 1 and n_genes_father == 2) or (n_genes_mother == 2 and n_genes_father == 1):
-                    p_gene = 0.5 * (1 - PROBS["mutation"])
-                elif n_genes_mother == 2 and n_genes_father == 2:
-                    p_gene = (1 - PROBS["mutation"]) * (1 - PROBS["mutation"])
-                    
+            p_gene = INHERITANCE[n_genes_mother, n_genes_father, genes]
 
         # Get probability of trait
-        p_trait = PROBS["trait"][genes][trait]
+        p_trait = TRAIT[genes, int(trait)]
 
         # Update joint probability
         p *= p_gene * p_trait
 
-    return p
+    return float(p)
 
-def update(probabilities, one_gene, two_genes, have_trait, p):
+
+def joint_probabilities(people, genes, traits):
     """
-    Add to `probabilities` a new joint probability `p`.
-    Each person should have their "gene" and "trait" distributions updated.
-    Which value for each distribution is updated depends on whether
-    the person is in `have_gene` and `have_trait`, respectively.
+    Compute and return a batch of joint probabilities.
+
+    `genes` is an integer array of shape (batch, len(people)) holding each
+    person's number of copies of the gene, and `traits` a boolean array of
+    the same shape saying whether they have the trait. Columns follow the
+    order of `people`. Return an array with the joint probability of each
+    row, as `joint_probability` would compute it.
     """
-    
-    # Loop over all people
-    for person in probabilities:
-        # Get number of genes
-        genes = 2 if person in two_genes else 1 if person in one_gene else 0
+    names = list(people)
+    index = {person: i for i, person in enumerate(names)}
+    founders = [i for i, person in enumerate(names) if people[person]["mother"] is None]
+    children = [i for i, person in enumerate(names) if people[person]["mother"] is not None]
+    mothers = [index[people[names[i]]["mother"]] for i in children]
+    fathers = [index[people[names[i]]["father"]] for i in children]
+
+    p = GENE[genes[:, founders]].prod(axis=1)
+    p *= INHERITANCE[genes[:, mothers], genes[:, fathers], genes[:, children]].prod(axis=1)
+    p *= TRAIT[genes, traits.astype(np.intp)].prod(axis=1)
+    return p
 
-        # Update gene distribution
-        probabilities[person]["gene"][genes] += p
 
-        # Update trait distribution
-        probabilities[person]["trait"][person in have_trait] += p
+def vectorized_probabilities(people, batch_size=1 << 14):
+    """
+    Return gene and trait probabilities for each person like
+    `enumerate_probabilities`, but decode assignments from integer codes
+    and score them `batch_size` at a time with `joint_probabilities`.
+    Known traits are fixed, so only unknown traits are enumerated.
+    """
+    names = list(people)
+    unknown = [i for i, person in enumerate(names) if people[person]["trait"] is None]
+    known = np.array([bool(people[person]["trait"]) for person in names])
+
+    # Each code is a mixed-radix number: a base-3 digit per person's genes
+    # followed by a base-2 digit per unknown trait
+    radices = [3] * len(names) + [2] * len(unknown)
+    total = 3 ** len(names) * 2 ** len(unknown)
+
+    gene_totals = np.zeros((len(names), 3))
+    trait_totals = np.zeros((len(names), 2))
+    for start in range(0, total, batch_size):
+        codes = np.arange(start, min(start + batch_size, total))
+        digits = np.empty((len(codes), len(radices)), dtype=np.intp)
+        for j, radix in enumerate(radices):
+            codes, digits[:, j] = np.divmod(codes, radix)
+
+        genes = digits[:, :len(names)]
+        traits = np.broadcast_to(known, genes.shape).copy()
+        traits[:, unknown] = digits[:, len(names):]
+
+        p = joint_probabilities(people, genes, traits)
+        gene_totals += np.einsum("b,bjg->jg", p, genes[:, :, np.newaxis] == np.arange(3))
+        trait_totals[:, 1] += p @ traits
+        trait_totals[:, 0] += p @ ~traits
+
+    probabilities = {}
+    for j, person in enumerate(names):
+        probabilities[person] = {
+            "gene": {genes: float(gene_totals[j, genes]) for genes in (2, 1, 0)},
+            "trait": {
+                True: float(trait_totals[j, 1]),
+                False: float(trait_totals[j, 0])
+            }
+        }
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
 
 
 def normalize(probabilities):
@@ -252,4 +401,338 @@ def normalize(probabilities):
             probabilities[person]["trait"][trait] /= trait_sum
 
 
-main()
+def contract(factors, keep):
+    """
+    Multiply `factors` together and sum out every variable not in `keep`.
+    Each factor is a (variables, table) pair with one axis of size 3 per
+    variable. Return the resulting factor over `keep`.
+    """
+    ids = {}
+    operands = []
+    for variables, table in factors:
+        operands.append(table)
+        operands.append([ids.setdefault(variable, len(ids)) for variable in variables])
+    keep = tuple(keep)
+    return keep, np.einsum(*operands, [ids[variable] for variable in keep])
+
+
+def message(factors, keep):
+    """
+    Like `contract`, but scale the result to sum to 1 so that long chains
+    of messages do not underflow. Marginals are unaffected by the scale.
+    """
+    variables, table = contract(factors, keep)
+    return variables, table / table.sum()
+
+
+def elimination_order(people):
+    """
+    Return an order in which to eliminate each person's gene variable,
+    choosing the person with the fewest remaining neighbours each time in
+    the graph that links every child to its parents and the parents to
+    each other.
+    """
+    neighbours = {person: set() for person in people}
+    for person in people:
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is not None and father is not None:
+            family = {person, mother, father}
+            for member in family:
+                neighbours[member] |= family - {member}
+
+    heap = [(len(neighbours[person]), person) for person in people]
+    heapq.heapify(heap)
+    order = []
+    eliminated = set()
+    while heap:
+        degree, person = heapq.heappop(heap)
+        if person in eliminated or degree != len(neighbours[person]):
+            continue
+        order.append(person)
+        eliminated.add(person)
+
+        # Eliminating a person connects all of their remaining neighbours
+        remaining = neighbours.pop(person)
+        for neighbour in remaining:
+            neighbours[neighbour] |= remaining - {neighbour}
+            neighbours[neighbour].discard(person)
+            heapq.heappush(heap, (len(neighbours[neighbour]), neighbour))
+    return order
+
+
+def eliminate_probabilities(people, probs=PROBS):
+    """
+    Return gene and trait probabilities for each person by exact inference
+    on the pedigree as a Bayesian network.
+
+    Each person's gene count is a variable, with a prior or inheritance
+    factor and, if their trait is known, an evidence factor. Factors are
+    collected into buckets along an elimination order, and messages are
+    passed up and back down the resulting bucket tree, so every person's
+    marginal comes out of two passes. For tree-like families this takes
+    time linear in the number of people.
+    """
+    gene, trait, table = probability_tables(probs)
+
+    factors = []
+    for person in people:
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is None and father is None:
+            factors.append(((person,), gene))
+        else:
+            factors.append(((mother, father, person), table))
+        if people[person]["trait"] is not None:
+            factors.append(((person,), trait[:, int(people[person]["trait"])]))
+
+    # Put each factor in the bucket of its first eliminated variable
+    order = elimination_order(people)
+    position = {person: i for i, person in enumerate(order)}
+    buckets = {person: [] for person in order}
+    for factor in factors:
+        buckets[min(factor[0], key=position.get)].append(factor)
+
+    # Upward pass: each bucket sums out its variable and sends the result
+    # to the bucket of the next variable to be eliminated in it
+    upward = {}
+    parent = {}
+    children = {person: [] for person in order}
+    for person in order:
+        incoming = [upward[child] for child in children[person]]
+        scope = set().union(*(variables for variables, _ in buckets[person] + incoming)) - {person}
+        upward[person] = message(buckets[person] + incoming, sorted(scope, key=position.get))
+        if scope:
+            parent[person] = min(scope, key=position.get)
+            children[parent[person]].append(person)
+
+    # Downward pass: beliefs and messages back towards the leaves
+    downward = {}
+    probabilities = {}
+    for person in reversed(order):
+        # A unit factor keeps the person in scope even if no other factor has them
+        received = [((person,), np.ones(3))]
+        if person in downward:
+            received.append(downward[person])
+        incoming = [upward[child] for child in children[person]]
+
+        _, belief = contract(buckets[person] + incoming + received, [person])
+        belief = belief / belief.sum()
+        if people[person]["trait"] is None:
+            has_trait = float(belief @ trait[:, 1])
+        else:
+            has_trait = float(people[person]["trait"])
+        probabilities[person] = {
+            "gene": {genes: float(belief[genes]) for genes in (2, 1, 0)},
+            "trait": {
+                True: has_trait,
+                False: 1 - has_trait
+            }
+        }
+
+        for i, child in enumerate(children[person]):
+            others = incoming[:i] + incoming[i + 1:]
+            downward[child] = message(buckets[person] + others + received, upward[child][0])
+
+    return {person: probabilities[person] for person in people}
+
+
+def sample_categorical(rng, weights):
+    """
+    Draw one index per row of the (batch, k) array `weights`, with
+    probability proportional to the row's entries.
+    """
+    cumulative = weights.cumsum(axis=1)
+    u = rng.random(len(weights)) * cumulative[:, -1]
+    return np.minimum((u[:, np.newaxis] >= cumulative).sum(axis=1), weights.shape[1] - 1)
+
+
+def estimates(people, genes, has_trait, errors):
+    """
+    Return (probabilities, errors) dicts in the shape `main` prints from
+    per-person arrays: `genes` of shape (n, 3), `has_trait` of shape (n,)
+    and `errors` of shape (n, 4), the last column for the trait.
+    """
+    probabilities, standard_errors = {}, {}
+    for j, person in enumerate(people):
+        probabilities[person] = {
+            "gene": {value: float(genes[j, value]) for value in (2, 1, 0)},
+            "trait": {True: float(has_trait[j]), False: float(1 - has_trait[j])}
+        }
+        standard_errors[person] = {
+            "gene": {value: float(errors[j, value]) for value in (2, 1, 0)},
+            "trait": {True: float(errors[j, 3]), False: float(errors[j, 3])}
+        }
+    return probabilities, standard_errors
+
+
+def likelihood_weighting(people, samples=100000, seed=None, batch_size=10000, min_effective=100, probs=PROBS):
+    """
+    Estimate gene and trait probabilities for each person by likelihood
+    weighting, returning (probabilities, errors) where `errors` holds the
+    standard error of each estimate.
+
+    Genes are drawn parents first, `batch_size` samples at a time, and each
+    sample is weighted by the probability of the known traits. Unknown
+    traits are averaged over exactly rather than sampled.
+
+    When the known traits are unlikely a priori, a few samples carry most
+    of the weight, and the delta-method error alone understates the true
+    error, most of all for rare outcomes no heavy sample happened to hit.
+    Errors are therefore never reported below what the effective sample
+    size (sum w)^2 / sum w^2 allows, and a SamplingWarning is issued when
+    it falls below `min_effective`.
+    """
+    rng = np.random.default_rng(seed)
+    gene, trait, table = probability_tables(probs)
+    names = list(people)
+    index = {person: j for j, person in enumerate(names)}
+    order = [index[person] for person in topological_order(people)]
+    known = [(j, int(people[person]["trait"])) for j, person in enumerate(names) if people[person]["trait"] is not None]
+
+    # Weighted sums of each person's indicators [gene 0, 1, 2, trait], kept
+    # relative to the largest log weight seen so far
+    scale = -math.inf
+    weight, weight_squared = 0.0, 0.0
+    first = np.zeros((len(names), 4))
+    second = np.zeros((len(names), 4))
+    cross = np.zeros((len(names), 4))
+    for start in range(0, samples, batch_size):
+        batch = min(batch_size, samples - start)
+        genes = np.empty((batch, len(names)), dtype=np.intp)
+        for j in order:
+            mother, father = people[names[j]]["mother"], people[names[j]]["father"]
+            if mother is None:
+                genes[:, j] = sample_categorical(rng, np.broadcast_to(gene, (batch, 3)))
+            else:
+                genes[:, j] = sample_categorical(rng, table[genes[:, index[mother]], genes[:, index[father]]])
+
+        log_weights = np.zeros(batch)
+        for j, observed in known:
+            log_weights += np.log(trait[genes[:, j], observed])
+        if log_weights.max() > scale:
+            shift = math.exp(scale - log_weights.max()) if scale > -math.inf else 0.0
+            weight *= shift
+            first *= shift
+            weight_squared *= shift ** 2
+            second *= shift ** 2
+            cross *= shift ** 2
+            scale = log_weights.max()
+        weights = np.exp(log_weights - scale)
+
+        values = np.empty((batch, len(names), 4))
+        values[:, :, :3] = genes[:, :, np.newaxis] == np.arange(3)
+        values[:, :, 3] = trait[genes, 1]
+        for j, observed in known:
+            values[:, j, 3] = observed
+
+        weight += weights.sum()
+        weight_squared += weights @ weights
+        first += np.einsum("b,bjk->jk", weights, values)
+        cross += np.einsum("b,bjk->jk", weights ** 2, values)
+        second += np.einsum("b,bjk->jk", weights ** 2, values ** 2)
+
+    # Delta-method standard error of a self-normalized weighted mean, no
+    # smaller than that of a proportion from the effective sample size and
+    # never below one effective sample's worth
+    mean = first / weight
+    variance = second - 2 * mean * cross + mean ** 2 * weight_squared
+    effective = weight ** 2 / weight_squared
+    errors = np.maximum.reduce([
+        np.sqrt(np.maximum(variance, 0)) / weight,
+        np.sqrt(np.clip(mean * (1 - mean), 0, None) / effective),
+        np.full_like(mean, 1 / effective)
+    ])
+
+    # Known traits are exact
+    for j, _ in known:
+        errors[j, 3] = 0.0
+
+    if effective < min_effective:
+        warnings.warn(
+            f"likelihood weighting kept only {effective:.0f} effective samples of {samples}",
+            SamplingWarning
+        )
+    return estimates(names, mean[:, :3], mean[:, 3], errors)
+
+
+def gibbs_sampling(people, samples=100000, chains=100, burn_in=200, seed=None, probs=PROBS):
+    """
+    Estimate gene and trait probabilities for each person with a Gibbs
+    sampler over the gene variables, returning (probabilities, errors)
+    where `errors` holds the standard error of each estimate.
+
+    `chains` independent chains are updated together, one person at a time,
+    each sweep drawing that person's genes given their parents, children,
+    co-parents and known trait. After `burn_in` sweeps, sweeps are recorded
+    until `samples` draws are collected across chains, and standard errors
+    come from the spread of the per-chain estimates.
+    """
+    rng = np.random.default_rng(seed)
+    gene, trait, table = probability_tables(probs)
+    as_father = table.transpose(1, 0, 2)
+    names = list(people)
+    index = {person: j for j, person in enumerate(names)}
+
+    # For each person, the factors that mention their genes
+    mothered = {person: [] for person in names}
+    fathered = {person: [] for person in names}
+    for person in names:
+        if people[person]["mother"] is not None:
+            mothered[people[person]["mother"]].append(person)
+            fathered[people[person]["father"]].append(person)
+    conditionals = []
+    for person in names:
+        mother, father = people[person]["mother"], people[person]["father"]
+        parents = None if mother is None else (index[mother], index[father])
+        evidence = None if people[person]["trait"] is None else trait[:, int(people[person]["trait"])]
+        conditionals.append((
+            parents, evidence,
+            [index[child] for child in mothered[person]],
+            [index[people[child]["father"]] for child in mothered[person]],
+            [index[child] for child in fathered[person]],
+            [index[people[child]["mother"]] for child in fathered[person]]
+        ))
+
+    genes = sample_categorical(rng, np.broadcast_to(gene, (chains * len(names), 3))).reshape(chains, len(names))
+    sweeps = -(-samples // chains)
+    totals = np.zeros((chains, len(names), 4))
+    for sweep in range(burn_in + sweeps):
+        for j, (parents, evidence, mothered, fathers, fathered, mothers) in enumerate(conditionals):
+            if parents is None:
+                weights = np.tile(gene, (chains, 1))
+            else:
+                weights = table[genes[:, parents[0]], genes[:, parents[1]]].copy()
+            if evidence is not None:
+                weights *= evidence
+            if mothered:
+                weights *= table[:, genes[:, fathers], genes[:, mothered]].prod(axis=2).T
+            if fathered:
+                weights *= as_father[:, genes[:, mothers], genes[:, fathered]].prod(axis=2).T
+            genes[:, j] = sample_categorical(rng, weights)
+
+        if sweep >= burn_in:
+            totals[:, :, :3] += genes[:, :, np.newaxis] == np.arange(3)
+            totals[:, :, 3] += trait[genes, 1]
+
+    means = totals / sweeps
+    for j, person in enumerate(names):
+        if people[person]["trait"] is not None:
+            means[:, j, 3] = people[person]["trait"]
+    mean = means.mean(axis=0)
+    errors = means.std(axis=0, ddof=1) / math.sqrt(chains) if chains > 1 else np.full_like(mean, math.nan)
+    return estimates(names, mean[:, :3], mean[:, 3], errors)
+
+
+METHODS = {
+    "elimination": eliminate_probabilities,
+    "enumeration": enumerate_probabilities,
+    "vectorized": vectorized_probabilities
+}
+
+SAMPLERS = {
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,73 @@ PROBS = {
     "mutation": 0.01
 }
 
+def founder_genes_possibility(trait=None):
+    """
+    Return the genes possibility of a person without parents, given their
+    trait if it is known.
+    """
+    if trait == None:
+        return dict(PROBS["gene"])
+
+    genes_0_possibility = PROBS["trait"][0][trait] * PROBS["gene"][0]
+    genes_1_posibility = PROBS["trait"][1][trait] * PROBS["gene"][1]
+    genes_2_possibility = PROBS["trait"][2][trait] * PROBS["gene"][2]
+
+    return {
+        0: genes_0_possibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
+        1: genes_1_posibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
+        2: genes_2_possibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
+    }
+
+
+def child_genes_possibility(father_genes_possibility, mother_genes_possibility):
+    """
+    Return the genes possibility of a child given their parents' genes
+    possibilities.
+    """
+    genes_2_possibility = father_genes_possibility[2] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * (1 - PROBS["mutation"])
+    genes_2_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * (1 - PROBS["mutation"]) * 2
+    genes_2_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
+    genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[2] * (1 - PROBS["mutation"]) * 2
+    genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[1] * 0.5 * 2
+    genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[0] * PROBS["mutation"]
+
+    genes_1_possibility = father_genes_possibility[2] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * PROBS["mutation"] * 2
+    genes_1_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * 2
+    genes_1_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
+    genes_1_possibility += father_genes_possibility[0] * mother_genes_possibility[2] * 2
+    genes_1_possibility += father_genes_possibility[0] * mother_genes_possibility[1] * 0.5 * 2
+    genes_1_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[0] * (1 - PROBS["mutation"]) * 2
+
+    genes_0_possibility = father_genes_possibility[2] * PROBS["mutation"] * mother_genes_possibility[2] * PROBS["mutation"]
+    genes_0_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * PROBS["mutation"] * 2
+    genes_0_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
+    genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * PROBS["mutation"] * 2
+    genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[1] * 0.5 * 2
+    genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[0] * (1 - PROBS["mutation"])
+
+    return {
+        0: genes_0_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
+        1: genes_1_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
+        2: genes_2_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
+    }
+
+
+def trait_possibility(trait, genes_possibility):
+    """
+    Return the possibility of having the trait given a person's known
+    trait, or else their genes possibility.
+    """
+    if trait != None:
+        return PROBS["trait"][trait][True]
+
+    trait_2_possibility = genes_possibility[2] * PROBS["trait"][2][True]
+    trait_1_possibility = genes_possibility[1] * PROBS["trait"][1][True]
+    trait_0_possibility = genes_possibility[0] * PROBS["trait"][0][True]
+
+    return trait_2_possibility + trait_1_possibility + trait_0_possibility
+
+
 class Node:
     def __init__(self, name, father=None, mother=None, trait=None):
         self.name = name
@@ -38,72 +105,113 @@ class Node:
         self.mother = mother
         self.trait = trait
 
+    def parents(self):
+        return [parent for parent in (self.father, self.mother) if parent is not None]
+
     def get_genes_possibility(self):
-        ren = None
-        if self.father is None and self.mother is None:
-            if self.trait == None:
-                ren = PROBS["gene"]
-            else:
-                genes_0_possibility = PROBS["trait"][0][self.trait] * PROBS["gene"][0]
-                genes_1_posibility = PROBS["trait"][1][self.trait] * PROBS["gene"][1]
-                genes_2_possibility = PROBS["trait"][2][self.trait] * PROBS["gene"][2]
-
-                ren = {
-                    0: genes_0_possibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
-                    1: genes_1_posibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
-                    2: genes_2_possibility / (genes_0_possibility + genes_1_posibility + genes_2_possibility),
-                }
-        else:
-            father_genes_possibility = self.father.get_genes_possibility()
-            mother_genes_possibility = self.mother.get_genes_possibility()
-
-            genes_2_possibility = father_genes_possibility[2] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * (1 - PROBS["mutation"])
-            genes_2_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * (1 - PROBS["mutation"]) * 2
-            genes_2_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
-            genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[2] * (1 - PROBS["mutation"]) * 2
-            genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[1] * 0.5 * 2
-            genes_2_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[0] * PROBS["mutation"]
-
-            genes_1_possibility = father_genes_possibility[2] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * PROBS["mutation"] * 2
-            genes_1_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * 2
-            genes_1_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
-            genes_1_possibility += father_genes_possibility[0] * mother_genes_possibility[2] * 2
-            genes_1_possibility += father_genes_possibility[0] * mother_genes_possibility[1] * 0.5 * 2
-            genes_1_possibility += father_genes_possibility[0] * PROBS["mutation"] * mother_genes_possibility[0] * (1 - PROBS["mutation"]) * 2
-
-            genes_0_possibility = father_genes_possibility[2] * PROBS["mutation"] * mother_genes_possibility[2] * PROBS["mutation"]
-            genes_0_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[2] * PROBS["mutation"] * 2
-            genes_0_possibility += father_genes_possibility[1] * 0.5 * mother_genes_possibility[1] * 0.5
-            genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[2] * PROBS["mutation"] * 2
-            genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[1] * 0.5 * 2
-            genes_0_possibility += father_genes_possibility[0] * (1 - PROBS["mutation"]) * mother_genes_possibility[0] * (1 - PROBS["mutation"])
-
-            ren = {
-                0: genes_0_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
-                1: genes_1_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
-                2: genes_2_possibility / (genes_0_possibility + genes_1_possibility + genes_2_possibility),
-            }
-    
-        print(str(self.name) + " genes possibility: " + str(ren))
-        return ren
-        
-    def get_trait_possibility(self):
-        if self.trait != None:
-            return PROBS["trait"][self.trait][True]
+        return Pedigree([self]).genes_possibility(self)
 
-        genes_possibility = self.get_genes_possibility()
-        trait_2_possibility = genes_possibility[2] * PROBS["trait"][2][True]
-        trait_1_possibility = genes_possibility[1] * PROBS["trait"][1][True]
-        trait_0_possibility = genes_possibility[0] * PROBS["trait"][0][True]
+    def get_trait_possibility(self):
+        return Pedigree([self]).trait_possibility(self)
+
+
+class Pedigree:
+    """
+    A family of Nodes whose genes possibilities are each computed once,
+    parents before children, and remembered until a trait they depend on
+    changes.
+    """
+
+    def __init__(self, nodes=()):
+        self.children = {}
+        self.genes = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """
+        Add `node` and all of its ancestors to the pedigree.
+        """
+        new = []
+        stack = [node]
+        while stack:
+            ancestor = stack.pop()
+            if ancestor in self.children:
+                continue
+            self.children[ancestor] = []
+            new.append(ancestor)
+            stack.extend(ancestor.parents())
+
+        for child in new:
+            for parent in child.parents():
+                self.children[parent].append(child)
+
+    def genes_possibility(self, node):
+        """
+        Return the genes possibility of `node`, first computing those of any
+        ancestors that are not yet known.
+        """
+        if node not in self.children:
+            self.add(node)
+
+        # Each person is pushed once to visit their parents and once more to
+        # be computed after them
+        stack = [(node, False)]
+        while stack:
+            person, ready = stack.pop()
+            if person in self.genes:
+                continue
+            if ready:
+                if person.father is None and person.mother is None:
+                    self.genes[person] = founder_genes_possibility(person.trait)
+                else:
+                    self.genes[person] = child_genes_possibility(self.genes[person.father], self.genes[person.mother])
+            else:
+                stack.append((person, True))
+                stack.extend((parent, False) for parent in person.parents() if parent not in self.genes)
+        return self.genes[node]
+
+    def trait_possibility(self, node):
+        """
+        Return the possibility that `node` has the trait.
+        """
+        if node.trait != None:
+            return trait_possibility(node.trait, None)
+        return trait_possibility(None, self.genes_possibility(node))
+
+    def set_trait(self, node, trait):
+        """
+        Record new trait evidence for `node`, forgetting the genes
+        possibilities of `node` and its descendants so that only they are
+        recomputed.
+        """
+        if node not in self.children:
+            self.add(node)
+        node.trait = trait
+
+        stack = [node]
+        while stack:
+            person = stack.pop()
+            if self.genes.pop(person, None) is not None:
+                stack.extend(self.children[person])
+
+    def evaluate(self):
+        """
+        Return a dict from each node's name to its genes possibility.
+        """
+        return {node.name: self.genes_possibility(node) for node in self.children}
 
-        return trait_2_possibility + trait_1_possibility + trait_0_possibility
 
 # name,mother,father,trait
 # Harry,Lily,James,
 # James,,,1
 # Lily,,,0
-james = Node("James", None, None, True)
-lily = Node("Lily", None, None, False)
-harry = Node("Harry", james, lily, None)
-
-print("Harry trait possibility: " + str(harry.get_trait_possibility()))
\ No newline at end of file
+if __name__ == "__main__":
+    james = Node("James", None, None, True)
+    lily = Node("Lily", None, None, False)
+    harry = Node("Harry", james, lily, None)
+
+    pedigree = Pedigree([harry])
+    for node in (james, lily, harry):
+        print(str(node.name) + " genes possibility: " + str(pedigree.genes_possibility(node)))
+    print("Harry trait possibility: " + str(pedigree.trait_possibility(harry)))
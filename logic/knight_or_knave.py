@@ -1,4 +1,4 @@
-from logic import Symbol, And, Or, Not, Implication, model_check
+from logic import Symbol, And, Or, Not, Implication, entails
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -89,7 +89,7 @@ def main():
             print("    Not yet implemented.")
         else:
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if entails(knowledge, symbol):
                     print(f"    {symbol}")
 
 
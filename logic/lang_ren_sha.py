@@ -7,7 +7,7 @@ import logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(filename='./logic/log' + now + '.txt', level=logging.DEBUG)
 
-from logic import Symbol, And, Or, Not, Implication, model_check
+from logic import Symbol, And, Or, Not, Implication, ModelCounter
 
 ROLES = ['citizen', 'werewolf', 'prophet']
 
@@ -146,11 +146,11 @@ class Player:
         return self.knowledge
     
     def get_probabilities(self, players, target):
+        counter = ModelCounter(self.knowledge)
         probabilities = []
         for player in players:
             symbol = Symbol(player.get_name() + ' is ' + target)
-            model_check(self.knowledge, symbol)
-            probabilities.append((player, symbol.true / (symbol.true + symbol.false)))
+            probabilities.append((player, counter.probability(symbol)))
 
         logger.info(self.knowledge)
         logger.info(probabilities)
@@ -1,6 +1,9 @@
 import re
+import heapq
 import itertools
 
+import numpy as np
+
 class Sentence:
     def evaluate(self, model):
         raise NotImplementedError
@@ -195,4 +198,513 @@ def model_check(knowledge, query):
     
     symbols = knowledge.symbols().union(query.symbols())
 
-    return check_all(knowledge, query, symbols, model={})
\ No newline at end of file
+    return check_all(knowledge, query, symbols, model={})
+
+# Tseitin compilation to conjunctive normal form. Each symbol gets a positive
+# integer variable and each compound subsentence a fresh variable defined to
+# be equivalent to it, so that every model of the sentence extends to exactly
+# one model of the clauses. Literals are +v / -v; a clause is a list of them.
+class CNF:
+    def __init__(self, *sentences):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+        for sentence in sentences:
+            self.add(sentence)
+
+    def copy(self):
+        cnf = CNF()
+        cnf.variables = dict(self.variables)
+        cnf.count = self.count
+        cnf.clauses = list(self.clauses)
+        cnf.literals = dict(self.literals)
+        return cnf
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        Sentence.validate(sentence)
+
+        # Conjunctions and disjunctions at the top need no definitions
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        x = self.new_variable()
+        if isinstance(sentence, And):
+            operands = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            self.clauses.extend([-x, a] for a in operands)
+            self.clauses.append([x] + [-a for a in operands])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            self.clauses.extend([x, -a] for a in operands)
+            self.clauses.append([-x] + operands)
+        elif isinstance(sentence, Implication):
+            a, b = self.literal(sentence.antecedent), self.literal(sentence.consequent)
+            self.clauses.extend([[-x, -a, b], [x, a], [x, -b]])
+        elif isinstance(sentence, Biconditional):
+            a, b = self.literal(sentence.left), self.literal(sentence.right)
+            self.clauses.extend([[-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]])
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+        self.literals[sentence] = x
+        return x
+
+# Conflict-driven clause learning over CNF clauses: unit propagation with two
+# watched literals, first-UIP learning with backjumping, activity-ordered
+# decisions with saved phases, and restarts. The solver keeps its learned
+# clauses between calls to solve, which may add temporary assumptions.
+class Solver:
+    def __init__(self, clauses=(), count=0):
+        self.count = 0
+        self.clauses = []
+        self.watches = {}
+        self.units = []
+        self.inconsistent = False
+
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.increment = 1.0
+        self.heap = []
+
+        self.grow(count)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def grow(self, count):
+        while self.count < count:
+            self.count += 1
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            self.watches[self.count] = []
+            self.watches[-self.count] = []
+            heapq.heappush(self.heap, (0.0, self.count))
+
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        self.grow(max((abs(literal) for literal in clause), default=0))
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.attach(clause)
+
+    def attach(self, clause):
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            self.watches[false] = kept = []
+            for i, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) == -1:
+                        kept.extend(watching[i + 1:])
+                        return clause
+                    self.assign(clause[0], clause)
+        return None
+
+    def analyze(self, conflict):
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        clause = conflict
+        index = len(self.trail) - 1
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(literal)]
+            pending -= 1
+            if pending == 0:
+                break
+        learned[0] = -literal
+
+        # Watch the asserting literal and the latest of the others, which
+        # is also the level to jump back to
+        if len(learned) == 1:
+            return learned, 0
+        latest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[latest] = learned[latest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.count + 1) if self.values[v] == 0]
+            heapq.heapify(self.heap)
+        elif self.values[variable] == 0:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        if len(self.limits) <= level:
+            return
+        for literal in self.trail[self.limits[level]:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[self.limits[level]:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if self.values[variable] == 0 and -activity == self.activity[variable]:
+                return variable if self.phases[variable] else -variable
+        for variable in range(1, self.count + 1):
+            if self.values[variable] == 0:
+                return variable if self.phases[variable] else -variable
+        return None
+
+    # Return a satisfying model as a list indexed by variable, or None if the
+    # clauses together with the assumed literals are unsatisfiable
+    def solve(self, assumptions=()):
+        if self.inconsistent:
+            return None
+        self.grow(max((abs(literal) for literal in assumptions), default=0))
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.values = [0] * (self.count + 1)
+        self.heap = [(-self.activity[v], v) for v in range(1, self.count + 1)]
+        heapq.heapify(self.heap)
+
+        for literal in self.units:
+            if self.value(literal) == -1:
+                self.inconsistent = True
+                return None
+            if self.value(literal) == 0:
+                self.assign(literal, None)
+
+        conflicts, restart = 0, 100
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.inconsistent = True
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.units.append(learned[0])
+                else:
+                    self.attach(learned)
+                self.assign(learned[0], learned if len(learned) > 1 else None)
+                self.increment /= 0.95
+                conflicts += 1
+                continue
+
+            if conflicts >= restart:
+                conflicts, restart = 0, int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one level each
+            if len(self.limits) < len(assumptions):
+                literal = assumptions[len(self.limits)]
+                if self.value(literal) == -1:
+                    self.backtrack(0)
+                    return None
+                self.limits.append(len(self.trail))
+                if self.value(literal) == 0:
+                    self.assign(literal, None)
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                model = [value == 1 for value in self.values]
+                self.backtrack(0)
+                return model
+            self.limits.append(len(self.trail))
+            self.assign(literal, None)
+
+def satisfiable(sentence):
+    cnf = CNF(sentence)
+    model = Solver(cnf.clauses, cnf.count).solve()
+    if model is None:
+        return None
+    return {name: model[variable] for name, variable in cnf.variables.items()}
+
+def entails(knowledge, query):
+    cnf = CNF(knowledge, Not(query))
+    return Solver(cnf.clauses, cnf.count).solve() is None
+
+# Exact model counting. The knowledge is compiled once; each query is added to
+# a copy of its clauses, and since every Tseitin variable is determined by the
+# symbols, counting the clauses counts models over the symbols of the
+# knowledge and the query together, as model_check enumerates them. Counts
+# come from a DPLL search that splits the clauses into independent components
+# and caches each component's count, so the cache is shared by all queries
+# against the same knowledge.
+class ModelCounter:
+    def __init__(self, knowledge):
+        self.cnf = CNF(knowledge)
+        self.cache = {}
+
+    def count(self, query=None):
+        cnf = self.cnf.copy()
+        if query is not None:
+            cnf.add(query)
+        clauses = [frozenset(clause) for clause in cnf.clauses]
+        return self.count_clauses(clauses, set(range(1, cnf.count + 1)))
+
+    def counts(self, query):
+        return self.count(query), self.count(Not(query))
+
+    def probability(self, query):
+        true, false = self.counts(query)
+        if true + false == 0:
+            raise ValueError("knowledge has no models")
+        return true / (true + false)
+
+    # Number of assignments to `variables` that satisfy `clauses`, whose
+    # variables must all be among them
+    def count_clauses(self, clauses, variables):
+        if frozenset() in clauses:
+            return 0
+        clauses, assigned = propagate(clauses)
+        if clauses is None:
+            return 0
+        mentioned = {abs(literal) for clause in clauses for literal in clause}
+        total = 2 ** len(variables - assigned - mentioned)
+        for component in components(clauses):
+            total *= self.count_component(component)
+            if total == 0:
+                break
+        return total
+
+    def count_component(self, component):
+        if component in self.cache:
+            return self.cache[component]
+
+        # Branch on the variable in the most clauses
+        occurrences = {}
+        for clause in component:
+            for literal in clause:
+                occurrences[abs(literal)] = occurrences.get(abs(literal), 0) + 1
+        variable = max(occurrences, key=occurrences.get)
+        remaining = set(occurrences) - {variable}
+
+        total = 0
+        for literal in (variable, -variable):
+            clauses = condition(component, literal)
+            if clauses is not None:
+                total += self.count_clauses(clauses, remaining)
+        self.cache[component] = total
+        return total
+
+# Clauses left once `literal` is true, or None if one becomes empty
+def condition(clauses, literal):
+    result = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        result.append(clause)
+    return result
+
+# Apply unit clauses until none remain, returning the simplified clauses and
+# the variables they fixed, or None for the clauses on a conflict
+def propagate(clauses):
+    assigned = set()
+    while True:
+        unit = next((clause for clause in clauses if len(clause) == 1), None)
+        if unit is None:
+            return clauses, assigned
+        literal, = unit
+        assigned.add(abs(literal))
+        clauses = condition(clauses, literal)
+        if clauses is None:
+            return None, assigned
+
+# Split clauses into groups that share no variables
+def components(clauses):
+    by_variable = {}
+    for clause in clauses:
+        for literal in clause:
+            by_variable.setdefault(abs(literal), []).append(clause)
+
+    seen = set()
+    for clause in clauses:
+        if clause in seen:
+            continue
+        seen.add(clause)
+        group = [clause]
+        stack = [clause]
+        while stack:
+            for literal in stack.pop():
+                for other in by_variable.pop(abs(literal), ()):
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+                        stack.append(other)
+        yield frozenset(group)
+
+# Bit patterns of the first six symbols within a 64-bit word: bit j of the
+# pattern for symbol i is set when bit i of j is
+WORD_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+
+# Truth tables over all 2^n models at once. Model m assigns symbol i the value
+# of bit i of m and is stored in bit m % 64 of word m // 64, so each symbol is
+# a packed uint64 column and a sentence compiles to bitwise operations on them.
+class TruthTable:
+    def __init__(self, symbols, limit=25):
+        self.names = sorted(symbols)
+        if len(self.names) > limit:
+            raise ValueError(f"{len(self.names)} symbols is too many for a truth table")
+        self.models = 2 ** len(self.names)
+        self.words = max(1, self.models // 64)
+
+        # Columns are 2^n / 64 words each, so they are only built for the
+        # symbols a sentence uses, when it is first evaluated
+        self.columns = [None] * len(self.names)
+        self.ones = np.uint64(2 ** 64 - 1)
+        self.zeros = np.uint64(0)
+
+        # With fewer than six symbols only the low bits of the word are models
+        self.mask = np.uint64(2 ** min(self.models, 64) - 1)
+
+    def column(self, i):
+        if self.columns[i] is None:
+            if i < 6:
+                self.columns[i] = np.full(self.words, WORD_PATTERNS[i], dtype=np.uint64)
+            else:
+                self.columns[i] = np.where((np.arange(self.words) >> (i - 6)) & 1, self.ones, self.zeros)
+        return self.columns[i]
+
+    def evaluate(self, sentence):
+        function = compile_sentence(sentence, self.names)
+        for name in sentence.symbols():
+            self.column(self.names.index(name))
+        result = function(self.columns, self.ones, self.zeros)
+        return np.broadcast_to(result, self.words) & self.mask
+
+    def count(self, sentence):
+        return int(np.bitwise_count(self.evaluate(sentence)).sum())
+
+# Turn a sentence into a Python function of (columns, ones, zeros) made of one
+# NumPy bitwise operation per distinct compound subsentence
+def compile_sentence(sentence, names):
+    index = {name: i for i, name in enumerate(names)}
+    lines = []
+    temporaries = {}
+
+    def emit(sentence):
+        if isinstance(sentence, Symbol):
+            return f"v[{index[sentence.name]}]"
+        if sentence in temporaries:
+            return temporaries[sentence]
+        if isinstance(sentence, Not):
+            expression = f"~{emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            expression = " & ".join(emit(conjunct) for conjunct in sentence.conjuncts) or "ones"
+        elif isinstance(sentence, Or):
+            expression = " | ".join(emit(disjunct) for disjunct in sentence.disjuncts) or "zeros"
+        elif isinstance(sentence, Implication):
+            expression = f"~{emit(sentence.antecedent)} | {emit(sentence.consequent)}"
+        elif isinstance(sentence, Biconditional):
+            expression = f"~({emit(sentence.left)} ^ {emit(sentence.right)})"
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+        temporaries[sentence] = f"t{len(temporaries)}"
+        lines.append(f"    {temporaries[sentence]} = {expression}")
+        return temporaries[sentence]
+
+    result = emit(sentence)
+    source = "def evaluate(v, ones, zeros):\n" + "".join(line + "\n" for line in lines) + f"    return {result}\n"
+    namespace = {}
+    exec(compile(source, "<sentence>", "exec"), namespace)
+    return namespace["evaluate"]
+
+def table_check(knowledge, query):
+    table = TruthTable(knowledge.symbols().union(query.symbols()))
+    return not (table.evaluate(knowledge) & ~table.evaluate(query)).any()
+
+def table_counts(knowledge, query):
+    table = TruthTable(knowledge.symbols().union(query.symbols()))
+    knowledge = table.evaluate(knowledge)
+    query = table.evaluate(query)
+    return int(np.bitwise_count(knowledge & query).sum()), int(np.bitwise_count(knowledge & ~query).sum())
@@ -1,4 +1,4 @@
-from logic import Symbol, And, Or, Not, Implication, model_check
+from logic import Symbol, And, Or, Not, Implication, ModelCounter, entails
 
 rain = Symbol("rain") # It's raining.
 hagrid = Symbol("hagrid") # Zong will visit hagrid.
@@ -17,11 +17,12 @@ inference = rain
 
 print(knowledge.formula()) # Should be (rain => hagrid) ∧ (hagrid ∨ dumbledore) ∧ ¬(hagrid ∧ dumbledore) ∧ hagrid
 
+counter = ModelCounter(knowledge)
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if entails(knowledge, symbol):
         print(f"{symbol}: Yes")
     else:
-        prosibilities = symbol.true / (symbol.true + symbol.false)
+        prosibilities = counter.probability(symbol)
         if prosibilities == 0:
             print(f"{symbol}: No")
         else:
@@ -1,6 +1,13 @@
+import heapq
+import itertools
 import sys
+from collections import OrderedDict, deque
+
+import numpy as np
 
 class Node():
+    __slots__ = ("state", "parent", "action", "cost")
+
     def __init__(self, state, parent, action, cost):
         self.state = state
         self.parent = parent
@@ -36,121 +43,566 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
-        
+
+class DequeStackFrontier():
+    """
+    Drop-in replacement for StackFrontier backed by a deque, with a
+    companion set of queued states so membership checks are O(1).
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = set()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states.add(node.state)
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.states.discard(node.state)
+            return node
+
+class DequeQueueFrontier(DequeStackFrontier):
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
+            return node
+
+class PriorityFrontier():
+    """
+    Frontier that always removes the node with the lowest `priority(node)`.
+    Re-adding a state replaces the queued node for it, stale heap entries
+    are skipped on removal.
+    """
+    def __init__(self, priority):
+        self.priority = priority
+        self.frontier = []
+        self.states = {}
+        self.counter = itertools.count()
+
+    def add(self, node):
+        self.states[node.state] = node
+        heapq.heappush(self.frontier, (self.priority(node), next(self.counter), node))
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def cost(self, state):
+        return self.states[state].cost
+
+    def empty(self):
+        return len(self.states) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        while True:
+            _, _, node = heapq.heappop(self.frontier)
+            if self.states.get(node.state) is node:
+                del self.states[node.state]
+                return node
+
+def manhattan(state, goal):
+    return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+def octile(state, goal):
+    dy = abs(state[0] - goal[0])
+    dx = abs(state[1] - goal[1])
+    return max(dx, dy) + (2 ** 0.5 - 1) * min(dx, dy)
+
+HEURISTICS = {
+    "manhattan": manhattan,
+    "octile": octile
+}
+
+STRATEGIES = ["bfs", "dfs", "greedy", "astar", "bidirectional", "jps"]
+
+ACTIONS = ["up", "down", "left", "right"]
+MOVES = {(-1, 0): "up", (1, 0): "down", (0, -1): "left", (0, 1): "right"}
+
+def read_maze(filename):
+    """
+    Stream a maze file line by line into a (height, width) bool wall grid.
+    The first pass only measures the maze and locates the start and goal,
+    the second fills the grid one row at a time, so the file contents are
+    never held in memory all at once.
+    Return `(walls, start, goal)`.
+    """
+    height = width = 0
+    starts = goals = 0
+    with open(filename) as f:
+        for i, line in enumerate(f):
+            line = line.rstrip("\n")
+            height += 1
+            width = max(width, len(line))
+            if "A" in line:
+                starts += line.count("A")
+                start = (i, line.index("A"))
+            if "B" in line:
+                goals += line.count("B")
+                goal = (i, line.index("B"))
+
+    if starts != 1:
+        raise Exception("maze must have exactly one start point")
+
+    if goals != 1:
+        raise Exception("maze must have exactly one goal")
+
+    # Cells past the end of a short line are open
+    walls = np.zeros((height, width), dtype=bool)
+    with open(filename) as f:
+        for i, line in enumerate(f):
+            chars = np.frombuffer(line.rstrip("\n").encode("utf-32-le"), dtype="<u4")
+            walls[i, :len(chars)] = (chars != ord(" ")) & (chars != ord("A")) & (chars != ord("B"))
+
+    return walls, start, goal
+
 class Maze():
     def __init__(self, filename):
-        with open(filename) as f:
-            content = f.read()
-        
-        if content.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        
-        if content.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
-        
-        contents = content.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        self.walls, self.start, self.goal = read_maze(filename)
+        self.height, self.width = self.walls.shape
 
+        self.graph = None
         self.solution = None
 
+    def render(self):
+        """
+        Return the maze as a list of row strings, with the solution drawn
+        in if there is one.
+        """
+        grid = np.full((self.height, self.width), ord(" "), dtype=np.uint32)
+        grid[self.walls] = ord("█")
+        if self.solution is not None and self.solution[1]:
+            cells = np.array(self.solution[1])
+            grid[cells[:, 0], cells[:, 1]] = ord("*")
+        grid[self.start] = ord("A")
+        grid[self.goal] = ord("B")
+
+        # Each row of code points reinterpreted as one fixed-width string
+        return grid.view(f"U{self.width}").ravel().tolist()
+
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
-        print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
-        print()
+        sys.stdout.write("\n" + "\n".join(self.render()) + "\n\n")
+        sys.stdout.flush()
+
+    def output_image(self, filename, show_solution=True, show_explored=False, cell_size=10):
+        """
+        Save the maze to an image file. Explored cells are drawn as a
+        heatmap of their distance from the start, from yellow near it to
+        red far from it.
+        """
+        from PIL import Image
+
+        pixels = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        pixels[...] = (237, 240, 252)
+        pixels[self.walls] = (40, 40, 40)
+
+        if show_explored and getattr(self, "explored", None):
+            from scipy.sparse.csgraph import shortest_path
+            cells = np.array(list(self.explored))
+            distances = shortest_path(self.sparse_graph(), unweighted=True, indices=self.index(self.start))
+            heat = distances.reshape(self.height, self.width)[cells[:, 0], cells[:, 1]]
+            finite = np.isfinite(heat)
+            heat[~finite] = heat[finite].max() if finite.any() else 0
+            heat = (heat / heat.max() if heat.max() > 0 else heat)[:, np.newaxis]
+            near, far = np.array([255, 237, 160]), np.array([212, 40, 40])
+            pixels[cells[:, 0], cells[:, 1]] = (near + (far - near) * heat).astype(np.uint8)
+
+        if show_solution and self.solution is not None and self.solution[1]:
+            cells = np.array(self.solution[1])
+            pixels[cells[:, 0], cells[:, 1]] = (220, 235, 113)
+
+        pixels[self.start] = (255, 0, 0)
+        pixels[self.goal] = (0, 171, 28)
+
+        img = Image.fromarray(pixels, "RGB")
+        img = img.resize((self.width * cell_size, self.height * cell_size), Image.NEAREST)
+        img.save(filename)
+
+    def index(self, state):
+        return state[0] * self.width + state[1]
+
+    def cell(self, index):
+        return divmod(index, self.width)
+
+    def adjacency(self):
+        """
+        Return the graph of open cells in CSR form `(indptr, indices, moves)`,
+        keyed by flat cell index `row * width + col`. The neighbors of cell
+        `i` are `indices[indptr[i]:indptr[i + 1]]`, reached by the actions
+        `ACTIONS[moves[k]]`, in the same order `neighbors` lists them.
+        The table is built once and cached.
+        """
+        if self.graph is None:
+            open_cells = ~self.walls
+            valid = np.zeros((self.height, self.width, len(ACTIONS)), dtype=bool)
+            valid[1:, :, 0] = open_cells[1:] & open_cells[:-1]
+            valid[:-1, :, 1] = open_cells[:-1] & open_cells[1:]
+            valid[:, 1:, 2] = open_cells[:, 1:] & open_cells[:, :-1]
+            valid[:, :-1, 3] = open_cells[:, :-1] & open_cells[:, 1:]
+            valid = valid.reshape(-1, len(ACTIONS))
+
+            cells, moves = np.nonzero(valid)
+            offsets = np.array([-self.width, self.width, -1, 1])
+            indices = (cells + offsets[moves]).astype(np.int32)
+            indptr = np.zeros(self.height * self.width + 1, dtype=np.int64)
+            np.cumsum(valid.sum(axis=1), out=indptr[1:])
+            self.graph = (indptr, indices, moves.astype(np.uint8))
+        return self.graph
+
+    def sparse_graph(self):
+        from scipy.sparse import csr_matrix
+        indptr, indices, _ = self.adjacency()
+        size = self.height * self.width
+        return csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(size, size))
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        indptr, indices, moves = self.adjacency()
+        i = self.index(state)
+        begin, end = indptr[i], indptr[i + 1]
+        return [
+            (ACTIONS[move], self.cell(neighbor))
+            for move, neighbor in zip(moves[begin:end].tolist(), indices[begin:end].tolist())
         ]
-
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
     
-    def solve(self):
-        start = Node(state=self.start, parent=None, action=None, cost=0)
-        frontier = QueueFrontier()
+    def frontier(self, strategy, heuristic):
+        if strategy == "bfs":
+            return DequeQueueFrontier()
+        if strategy == "dfs":
+            return DequeStackFrontier()
+
+        if isinstance(heuristic, str):
+            if heuristic not in HEURISTICS:
+                raise Exception(f"unknown heuristic {heuristic}")
+            heuristic = HEURISTICS[heuristic]
+        goal = self.goal
+        cell = self.cell
+        if strategy == "greedy":
+            return PriorityFrontier(lambda node: heuristic(cell(node.state), goal))
+        if strategy == "astar":
+            # Break ties towards deeper nodes so open areas are not flooded
+            return PriorityFrontier(lambda node: (node.cost + heuristic(cell(node.state), goal), -node.cost))
+        raise Exception(f"unknown strategy {strategy}")
+
+    def solve(self, strategy="bfs", heuristic="manhattan"):
+        if strategy == "bidirectional":
+            return self.solve_bidirectional()
+        if strategy == "jps":
+            return self.solve_jps()
+
+        # Search on flat cell indices, converting back to (row, col) at the end
+        indptr, indices, moves = (memoryview(table) for table in self.adjacency())
+        goal = self.index(self.goal)
+
+        start = Node(state=self.index(self.start), parent=None, action=None, cost=0)
+        frontier = self.frontier(strategy, heuristic)
         frontier.add(start)
 
-        self.explored = set()
+        explored = set()
 
         while True:
             if frontier.empty():
+                self.explored = {self.cell(state) for state in explored}
                 raise Exception("no solution")
 
             node = frontier.remove()
-            self.explored.add(node.state)
+            explored.add(node.state)
 
-            if node.state == self.goal:
+            if node.state == goal:
                 actions = []
                 cells = []
                 while node.parent is not None:
                     actions.append(node.action)
-                    cells.append(node.state)
+                    cells.append(self.cell(node.state))
                     node = node.parent
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.explored = {self.cell(state) for state in explored}
                 return
 
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action, cost=node.cost + 1)
-                    frontier.add(child)
+            for k in range(indptr[node.state], indptr[node.state + 1]):
+                state = indices[k]
+                if state in explored:
+                    continue
+                if frontier.contains_state(state):
+                    # Only A* revisits queued states, when it finds a cheaper path
+                    if strategy != "astar" or frontier.cost(state) <= node.cost + 1:
+                        continue
+                child = Node(state=state, parent=node, action=ACTIONS[moves[k]], cost=node.cost + 1)
+                frontier.add(child)
+
+    def solve_bidirectional(self):
+        """
+        Breadth-first search from both the start and the goal, expanding a
+        whole layer of the smaller frontier at a time until the two meet.
+        """
+        indptr, indices, _ = (memoryview(table) for table in self.adjacency())
+        start, goal = self.index(self.start), self.index(self.goal)
+
+        # Parent and distance of every reached cell, for each direction
+        parents = [{start: None}, {goal: None}]
+        distances = [{start: 0}, {goal: 0}]
+        frontiers = [[start], [goal]]
+        explored = set()
+        meeting = None
+
+        while meeting is None:
+            if not frontiers[0] or not frontiers[1]:
+                self.explored = {self.cell(state) for state in explored}
+                raise Exception("no solution")
+
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            reached, distance = parents[side], distances[side]
+            other = distances[1 - side]
+
+            # Finish the layer so the shortest of its meeting points wins
+            layer = []
+            best = None
+            for state in frontiers[side]:
+                explored.add(state)
+                for k in range(indptr[state], indptr[state + 1]):
+                    neighbor = indices[k]
+                    if neighbor in reached:
+                        continue
+                    reached[neighbor] = state
+                    distance[neighbor] = distance[state] + 1
+                    layer.append(neighbor)
+                    if neighbor in other:
+                        length = distance[neighbor] + other[neighbor]
+                        if best is None or length < best:
+                            best, meeting = length, neighbor
+            frontiers[side] = layer
+
+        cells = []
+        state = meeting
+        while state is not None:
+            cells.append(state)
+            state = parents[0][state]
+        cells.reverse()
+        state = parents[1][meeting]
+        while state is not None:
+            cells.append(state)
+            state = parents[1][state]
+
+        cells = [self.cell(state) for state in cells]
+        actions = [
+            MOVES[(cell[0] - previous[0], cell[1] - previous[1])]
+            for previous, cell in zip(cells, cells[1:])
+        ]
+        self.solution = (actions, cells[1:])
+        self.explored = {self.cell(state) for state in explored}
+
+    def solve_jps(self):
+        """
+        Jump Point Search for the 4-neighborhood, run as A* with the
+        Manhattan heuristic over jump points only.
+
+        Horizontal moves keep going until a wall beside them ends, which
+        is the only place a shortest path needs to turn. Vertical moves
+        also stop wherever a horizontal jump from them would find a jump
+        point. Paths are as short as BFS ones. `self.explored` holds the
+        expanded jump points and `self.jumped` counts every cell stepped
+        over while jumping.
+        """
+        height, width = self.height, self.width
+        walls = memoryview(self.walls.reshape(-1))
+        goal = self.goal
+        jumped = 0
+
+        def passable(row, col):
+            return 0 <= row < height and 0 <= col < width and not walls[row * width + col]
+
+        def jump(row, col, drow, dcol):
+            nonlocal jumped
+            while True:
+                row, col = row + drow, col + dcol
+                if not passable(row, col):
+                    return None
+                jumped += 1
+                if (row, col) == goal:
+                    return (row, col)
+                if drow == 0:
+                    for side in (-1, 1):
+                        if passable(row + side, col) and not passable(row + side, col - dcol):
+                            return (row, col)
+                else:
+                    for side in (-1, 1):
+                        if passable(row, col + side) and not passable(row - drow, col + side):
+                            return (row, col)
+                    if jump(row, col, 0, -1) is not None or jump(row, col, 0, 1) is not None:
+                        return (row, col)
+
+        def directions(cell, parent):
+            row, col = cell
+            if parent is None:
+                return MOVES.keys()
+            drow = (row > parent[0]) - (row < parent[0])
+            dcol = (col > parent[1]) - (col < parent[1])
+            if drow != 0:
+                return [(drow, 0), (0, -1), (0, 1)]
+            return [(0, dcol)] + [
+                (side, 0) for side in (-1, 1)
+                if passable(row + side, col) and not passable(row + side, col - dcol)
+            ]
+
+        parents = {self.start: None}
+        costs = {self.start: 0}
+        frontier = [(manhattan(self.start, goal), 0, self.start)]
+        self.explored = set()
+
+        while frontier:
+            _, cost, cell = heapq.heappop(frontier)
+            if cell in self.explored or cost > costs[cell]:
+                continue
+            self.explored.add(cell)
+
+            if cell == goal:
+                points = []
+                while cell is not None:
+                    points.append(cell)
+                    cell = parents[cell]
+                points.reverse()
+
+                # Fill in the straight runs between consecutive jump points
+                actions = []
+                cells = []
+                for (row, col), (next_row, next_col) in zip(points, points[1:]):
+                    drow = (next_row > row) - (next_row < row)
+                    dcol = (next_col > col) - (next_col < col)
+                    while (row, col) != (next_row, next_col):
+                        row, col = row + drow, col + dcol
+                        actions.append(MOVES[(drow, dcol)])
+                        cells.append((row, col))
+                self.solution = (actions, cells)
+                self.jumped = jumped
+                return
+
+            for drow, dcol in directions(cell, parents[cell]):
+                point = jump(cell[0], cell[1], drow, dcol)
+                if point is None or point in self.explored:
+                    continue
+                point_cost = cost + abs(point[0] - cell[0]) + abs(point[1] - cell[1])
+                if point in costs and costs[point] <= point_cost:
+                    continue
+                costs[point] = point_cost
+                parents[point] = cell
+                heapq.heappush(frontier, (point_cost + manhattan(point, goal), point_cost, point))
+
+        self.jumped = jumped
+        raise Exception("no solution")
+
+
+class ShortestPaths():
+    """
+    Answer many (start, goal) shortest path queries against one maze.
+
+    Every query is answered from a breadth-first tree of predecessors
+    rooted at one of its endpoints. Mazes with at most `all_pairs_limit`
+    cells get a tree for every open cell up front, larger mazes build the
+    tree for a goal on first use and keep the `cache_size` most recently
+    used ones.
+    """
+    def __init__(self, maze, all_pairs_limit=2500, cache_size=64):
+        from scipy.sparse.csgraph import connected_components
+
+        self.maze = maze
+        self.cache_size = cache_size
+        self.graph = maze.sparse_graph()
+        size = maze.height * maze.width
+
+        # Cells in different components have no path between them
+        _, self.components = connected_components(self.graph, directed=False)
+
+        self.trees = OrderedDict()
+        self.all_pairs = size <= all_pairs_limit
+        if self.all_pairs:
+            for root in np.flatnonzero(~maze.walls.reshape(-1)).tolist():
+                self.trees[root] = self.tree(root)
+
+    def tree(self, root):
+        from scipy.sparse.csgraph import breadth_first_order
+        _, predecessors = breadth_first_order(self.graph, root, directed=True, return_predecessors=True)
+        return memoryview(predecessors)
+
+    def query(self, start, goal):
+        """
+        Return the shortest path from `start` to `goal` as an
+        `(actions, cells)` tuple, in the same format as `Maze.solution`.
+        """
+        maze = self.maze
+        for row, col in (start, goal):
+            if not (0 <= row < maze.height and 0 <= col < maze.width) or maze.walls[row, col]:
+                raise Exception("no solution")
+        source, target = maze.index(start), maze.index(goal)
+        if self.components[source] != self.components[target]:
+            raise Exception("no solution")
+
+        if target in self.trees:
+            self.trees.move_to_end(target)
+            path = self.walk(self.trees[target], source)[1:]
+        elif source in self.trees:
+            self.trees.move_to_end(source)
+            path = self.walk(self.trees[source], target)[::-1][1:]
+        else:
+            self.trees[target] = self.tree(target)
+            if not self.all_pairs and len(self.trees) > self.cache_size:
+                self.trees.popitem(last=False)
+            path = self.walk(self.trees[target], source)[1:]
+
+        cells = [maze.cell(state) for state in path]
+        actions = [
+            MOVES[(cell[0] - previous[0], cell[1] - previous[1])]
+            for previous, cell in zip([start] + cells, cells)
+        ]
+        return actions, cells
+
+    def walk(self, predecessors, state):
+        # Follow the tree from `state` up to its root, which has no predecessor
+        path = [state]
+        state = predecessors[state]
+        while state >= 0:
+            path.append(state)
+            state = predecessors[state]
+        return path
 
 def main():
-    if len(sys.argv) != 2:
-        raise Exception("Usage: python maze.py maze.txt")
+    if len(sys.argv) not in [2, 3]:
+        raise Exception("Usage: python maze.py maze.txt [" + "|".join(STRATEGIES) + "]")
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "bfs"
 
     maze = Maze(sys.argv[1])
     print("Maze:")
     maze.print()
 
     print("Solving...")
-    maze.solve()
+    maze.solve(strategy)
 
     print()
     print("States Explored:", len(maze.explored))
     print("Solution:")
     maze.print()
 
-main()
\ No newline at end of file
+    print("States Explored by Strategy:")
+    for other in STRATEGIES:
+        maze.solve(other)
+        line = f"  {other}: {len(maze.explored)} (path length {len(maze.solution[0])}"
+        if other == "jps":
+            line += f", {maze.jumped} cells jumped"
+        print(line + ")")
+    print()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from graph import LinkGraph
+from page_rank import DAMPING, SAMPLES, iterate_pagerank, sample_pagerank
+from sampling import parallel_walks, random_walk
+from solvers import METHODS, aitken, pagerank
+
+SIZES = [1000, 10000, 100000]
+AVERAGE_DEGREE = 8
+SAMPLES_PER_PAGE = 500
+SAMPLE_TOLERANCE = 0.1
+LEGACY_LIMIT = 1000
+SHORT_RUN_SEEDS = 3
+SHORT_RUN_RATIO = 1.25
+
+
+def pages(n):
+    return [f"{i}.html" for i in range(n)]
+
+
+def erdos_renyi(n, average_degree=AVERAGE_DEGREE, seed=None):
+    """
+    Return a random LinkGraph where every page links to a Poisson number
+    of pages chosen uniformly at random.
+    """
+    rng = np.random.default_rng(seed)
+    degree = rng.poisson(average_degree, n)
+    sources = np.repeat(np.arange(n), degree)
+    targets = rng.integers(n, size=len(sources))
+    keep = sources != targets
+    return LinkGraph.from_edges(pages(n), sources[keep], targets[keep])
+
+
+def scale_free(n, average_degree=AVERAGE_DEGREE, exponent=2.1, seed=None):
+    """
+    Return a random LinkGraph whose in- and out-degrees follow a power law
+    with the given `exponent`, by drawing link endpoints with probability
+    proportional to a per-page weight (the Chung-Lu model).
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.arange(1, n + 1) ** (-1 / (exponent - 1))
+    weights /= weights.sum()
+    links = int(average_degree * n)
+    sources = rng.permutation(n)[rng.choice(n, size=links, p=weights)]
+    targets = rng.choice(n, size=links, p=weights)
+    keep = sources != targets
+    return LinkGraph.from_edges(pages(n), sources[keep], targets[keep])
+
+
+def dangling_heavy(n, average_degree=AVERAGE_DEGREE, dangling_fraction=0.5, seed=None):
+    """
+    Return a random LinkGraph where `dangling_fraction` of the pages have
+    no links at all, and the rest link to uniformly random pages.
+    """
+    rng = np.random.default_rng(seed)
+    degree = rng.poisson(average_degree / (1 - dangling_fraction), n)
+    degree[rng.random(n) < dangling_fraction] = 0
+    sources = np.repeat(np.arange(n), degree)
+    targets = rng.integers(n, size=len(sources))
+    keep = sources != targets
+    return LinkGraph.from_edges(pages(n), sources[keep], targets[keep])
+
+
+GENERATORS = {
+    "erdos-renyi": erdos_renyi,
+    "scale-free": scale_free,
+    "dangling-heavy": dangling_heavy
+}
+
+
+def measure(function):
+    """
+    Return `(result, seconds, peak)` for a call of `function`, where
+    `peak` is the most memory in bytes allocated at once during the call.
+    The call is timed and traced in separate runs, as tracing slows it.
+    """
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark(graph, samples_per_page=SAMPLES_PER_PAGE, sample_tolerance=SAMPLE_TOLERANCE, legacy_limit=LEGACY_LIMIT):
+    """
+    Time every PageRank solver on a LinkGraph and print one line each.
+    Return whether the samplers came within `sample_tolerance` (L1) of
+    the iterative ranks.
+    """
+    n, links = len(graph), len(graph.indices)
+    samples = samples_per_page * n
+    passed = True
+
+    # Build the transition matrix once so SciPy's import is not timed
+    graph.transition_matrix()
+
+    exact = None
+    for method in METHODS:
+        (rank, convergence), seconds, peak = measure(lambda: pagerank(graph, DAMPING, method, tolerance=1e-8))
+        exact = rank if exact is None else exact
+        throughput = links * convergence.iterations / seconds
+        print(f"  {method:<16}{convergence.iterations:>6} iterations {seconds:>9.4f}s "
+              f"{throughput / 1e6:>9.1f}M links/s {peak / 1e6:>9.1f}MB")
+
+    samplers = {"parallel_walks": lambda: parallel_walks(graph, DAMPING, samples, seed=0)}
+    if n <= legacy_limit:
+        samplers["random_walk"] = lambda: random_walk(graph, DAMPING, samples, seed=0)
+    for name, sampler in samplers.items():
+        rank, seconds, peak = measure(sampler)
+        error = np.abs(rank - exact).sum()
+        status = "ok" if error <= sample_tolerance else "FAILED"
+        passed = passed and error <= sample_tolerance
+        print(f"  {name:<16}{samples:>6} samples    {seconds:>9.4f}s "
+              f"{samples / seconds / 1e6:>9.1f}M steps/s {peak / 1e6:>9.1f}MB  L1 {error:.4f} {status}")
+
+    # With only SAMPLES visits, as page_rank.py takes, the lockstep surfers
+    # must not carry more start bias than a single long walk
+    if n <= legacy_limit:
+        errors = {
+            name: np.mean([np.abs(sampler(graph, DAMPING, SAMPLES, seed=seed) - exact).sum()
+                           for seed in range(SHORT_RUN_SEEDS)])
+            for name, sampler in [("parallel_walks", parallel_walks), ("random_walk", random_walk)]
+        }
+        ok = errors["parallel_walks"] <= SHORT_RUN_RATIO * errors["random_walk"]
+        passed = passed and ok
+        print(f"  {'short run':<16}{SAMPLES:>6} samples    parallel_walks L1 {errors['parallel_walks']:.4f}, "
+              f"random_walk L1 {errors['random_walk']:.4f} {'ok' if ok else 'FAILED'}")
+
+    # The dictionary based reference implementations are quadratic
+    if n <= legacy_limit:
+        corpus = graph.to_corpus()
+        for name, solver in [("sample_pagerank", lambda: sample_pagerank(corpus, DAMPING, samples)),
+                             ("iterate_pagerank", lambda: iterate_pagerank(corpus, DAMPING))]:
+            _, seconds, peak = measure(solver)
+            print(f"  {name:<16}{'':>17} {seconds:>9.4f}s {'':>17} {peak / 1e6:>9.1f}MB")
+
+    return passed
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+
+    # Aitken extrapolation is exact on a geometric sequence such as 1 + 0.5 ** k
+    limit = aitken([np.array([1 + 0.5 ** k]) for k in range(3)])[0]
+    passed = abs(limit - 1) < 1e-12
+    print(f"aitken on 1 + 0.5 ** k: {limit:.6f} {'ok' if passed else 'FAILED'}")
+    print()
+
+    for n in sizes:
+        for name, generate in GENERATORS.items():
+            graph = generate(n, seed=0)
+            dangling = graph.dangling().mean()
+            print(f"{name}: {n} pages, {len(graph.indices)} links, {dangling:.0%} dangling")
+            passed = benchmark(graph) and passed
+            print()
+    if not passed:
+        sys.exit("Benchmark checks FAILED")
+
+
+if __name__ == "__main__":
+    main()
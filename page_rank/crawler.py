@@ -0,0 +1,89 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+PARALLEL_THRESHOLD = 64
+
+
+def extract_links(path, chunk_size=1 << 16, overlap=4096):
+    """
+    Return the set of link targets in the HTML file at `path`, reading it
+    in chunks of `chunk_size` characters rather than all at once.
+
+    The last `overlap` characters of each chunk are scanned again with the
+    next one, so tags cut by a chunk boundary are still found as long as
+    they are shorter than `overlap`.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            text = carry + chunk
+            end = 0
+            for match in LINK.finditer(text):
+                links.add(match.group(1))
+                end = match.end()
+            carry = text[max(end, len(text) - overlap):]
+    return links
+
+
+def crawl(directory, index=None, workers=None):
+    """
+    Parse a directory of HTML pages and return the same corpus dictionary
+    as `page_rank.crawl`, parsing files across a pool of `workers`
+    processes.
+
+    If `index` is the path of a JSON link index, pages whose modification
+    time and size match their entry are taken from it instead of being
+    parsed again, and the index is rewritten with the result.
+    """
+    cached = {}
+    if index is not None and os.path.exists(index):
+        with open(index) as f:
+            cached = json.load(f)
+
+    entries = {}
+    changed = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries[entry.name] = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+            old = cached.get(entry.name)
+            if old is not None and old["mtime"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+                entries[entry.name]["links"] = old["links"]
+            else:
+                changed.append(entry.name)
+
+    # Parse only new and modified pages, small batches are not worth a pool
+    paths = [os.path.join(directory, filename) for filename in changed]
+    workers = workers or os.cpu_count() or 1
+    if len(paths) >= PARALLEL_THRESHOLD and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(extract_links, paths, chunksize=max(1, len(paths) // (4 * workers)))
+            for filename, links in zip(changed, results):
+                entries[filename]["links"] = sorted(links)
+    else:
+        for filename, path in zip(changed, paths):
+            entries[filename]["links"] = sorted(extract_links(path))
+
+    if index is not None:
+        temporary = index + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(entries, f)
+        os.replace(temporary, index)
+
+    # Only include links to other pages in the corpus
+    return {
+        filename: set(
+            link for link in entry["links"]
+            if link in entries and link != filename
+        )
+        for filename, entry in entries.items()
+    }
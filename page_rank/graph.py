@@ -0,0 +1,197 @@
+import struct
+from functools import cached_property
+
+import numpy as np
+
+# File layout: header, int64 indptr, int64 name offsets, int32 indices,
+# then the UTF-8 page names back to back
+MAGIC = b"LINKGRPH"
+HEADER = struct.Struct("<8sQQQ")
+
+
+class PageNames():
+    """
+    Read-only sequence of page names, decoded on access from a buffer of
+    concatenated UTF-8 names and the offsets where each one starts.
+    """
+
+    def __init__(self, offsets, names):
+        self.offsets = memoryview(offsets)
+        self.names = names
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("page index out of range")
+        return bytes(self.names[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class LinkGraph():
+    """
+    Link structure of a corpus in compressed sparse row (CSR) form.
+
+    Pages are numbered in sorted order. The pages linked to by page `i`
+    are `indices[indptr[i]:indptr[i + 1]]`.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.indptr = indptr
+        self.indices = indices
+
+    @cached_property
+    def index(self):
+        return {page: i for i, page in enumerate(self.pages)}
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a LinkGraph from a corpus dictionary as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(index[link] for link in corpus[page])
+            indices.extend(links)
+            indptr[i + 1] = indptr[i] + len(links)
+
+        return cls(pages, indptr, np.array(indices, dtype=np.int32))
+
+    @classmethod
+    def from_edges(cls, pages, sources, targets):
+        """
+        Build a LinkGraph over `pages` from parallel arrays of source and
+        target page ids. Repeated links are kept only once.
+        """
+        n = len(pages)
+        codes = np.sort(np.asarray(sources, dtype=np.int64) * n + np.asarray(targets, dtype=np.int64))
+        codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes // n, minlength=n), out=indptr[1:])
+        return cls(pages, indptr, (codes % n).astype(np.int32))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load a LinkGraph written by `save`. Nothing is read up front: the
+        link arrays and page names are memory-mapped from the file, and
+        names are only decoded when looked up.
+        """
+        with open(filename, "rb") as f:
+            magic, n, m, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a link graph file")
+
+        offset = HEADER.size
+        indptr = np.memmap(filename, dtype="<i8", mode="r", offset=offset, shape=(n + 1,))
+        offset += 8 * (n + 1)
+        name_offsets = np.memmap(filename, dtype="<i8", mode="r", offset=offset, shape=(n + 1,))
+        offset += 8 * (n + 1)
+        indices = np.memmap(filename, dtype="<i4", mode="r", offset=offset, shape=(m,))
+        offset += 4 * m
+        names = np.memmap(filename, dtype=np.uint8, mode="r", offset=offset, shape=(size,)) if size else b""
+        return cls(PageNames(name_offsets, names), indptr, indices)
+
+    def save(self, filename):
+        """
+        Write the graph to `filename` in a compact binary format that
+        `load` can memory-map.
+        """
+        names = [page.encode("utf-8") for page in self.pages]
+        name_offsets = np.zeros(len(names) + 1, dtype="<i8")
+        np.cumsum([len(name) for name in names], out=name_offsets[1:])
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self), len(self.indices), int(name_offsets[-1])))
+            f.write(np.ascontiguousarray(self.indptr, dtype="<i8").tobytes())
+            f.write(name_offsets.tobytes())
+            f.write(np.ascontiguousarray(self.indices, dtype="<i4").tobytes())
+            for name in names:
+                f.write(name)
+
+    def to_corpus(self):
+        """
+        Return the graph as a corpus dictionary of sets of page names.
+        """
+        return {
+            page: set(self.pages[j] for j in self.links(i))
+            for i, page in enumerate(self.pages)
+        }
+
+    def __len__(self):
+        return len(self.pages)
+
+    def links(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edges(self):
+        """
+        Return the links as parallel arrays of source and target page ids.
+        """
+        sources = np.repeat(np.arange(len(self), dtype=np.int64), self.out_degree())
+        return sources, self.indices.astype(np.int64)
+
+    def with_changes(self, insertions=(), deletions=()):
+        """
+        Return a new LinkGraph with the links in `insertions` added and the
+        links in `deletions` removed, both given as (source, target) pairs
+        of page names already in the graph.
+        """
+        n = len(self)
+        sources, targets = self.edges()
+        codes = sources * n + targets
+        if deletions:
+            removed = np.array([self.index[source] * n + self.index[target] for source, target in deletions])
+            codes = codes[~np.isin(codes, removed)]
+        if insertions:
+            added = np.array([self.index[source] * n + self.index[target] for source, target in insertions])
+            codes = np.concatenate([codes, added])
+        return LinkGraph.from_edges(self.pages, codes // n, codes % n)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def dangling(self):
+        """
+        Return a boolean mask of pages without any outgoing links.
+        """
+        return self.out_degree() == 0
+
+    def transition_matrix(self):
+        """
+        Return the sparse matrix `M` with `M[i, j] = 1 / out_degree(i)` for
+        every link from page `i` to page `j`. Rows of dangling pages are
+        empty, callers spread their rank over all pages.
+        """
+        from scipy.sparse import csr_matrix
+        degree = self.out_degree()
+        data = np.repeat(1 / np.maximum(degree, 1), degree)
+        return csr_matrix((data, self.indices, self.indptr), shape=(len(self), len(self)))
+
+    def distribution(self, weights):
+        """
+        Return a probability vector over the graph's pages from a
+        dictionary mapping page names to non-negative weights.
+        """
+        vector = np.zeros(len(self))
+        for page, weight in weights.items():
+            vector[self.index[page]] = weight
+        return vector / vector.sum()
+
+    def ranks(self, vector):
+        """
+        Return a dictionary mapping each page name to its value in `vector`.
+        """
+        return dict(zip(self.pages, vector.tolist()))
@@ -1,8 +1,12 @@
 import os
-import random
 import re
 import sys
 
+import crawler
+from graph import LinkGraph
+from sampling import random_walk
+from solvers import METHODS, pagerank, power_iteration
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -47,13 +51,13 @@ def transition_model(corpus, page, damping_factor):
     
     # If the page has no links, return a probability distribution that chooses randomly from all pages
     if len(corpus[page]) == 0:
-        for page in corpus:
-            probability_distribution[page] = 1 / len(corpus)
+        for p in corpus:
+            probability_distribution[p] = 1 / len(corpus)
         return probability_distribution
     
     # Calculate the probability of choosing a link at random from all pages
-    for page in corpus:
-        probability_distribution[page] = (1 - damping_factor) / len(corpus)
+    for p in corpus:
+        probability_distribution[p] = (1 - damping_factor) / len(corpus)
 
     # Calculate the probability of choosing a link at random linked to the page
     for linked_page in corpus[page]:
@@ -71,26 +75,10 @@ def sample_pagerank(corpus, damping_factor, n):
     PageRank values should sum to 1.
     """
 
-    # Create a dictionary to store the number of times each page is visited
-    page_visits = {page: 0 for page in corpus}
-    
-    # Choose a random page to start
-    current_page = random.choice(list(corpus.keys()))
-    
-    # Visit n pages
-    for i in range(n):
-        page_visits[current_page] += 1
-        
-        # Get the probability distribution for the current page
-        probability_distribution = transition_model(corpus, current_page, damping_factor)
-        
-        # Choose the next page based on the probability distribution
-        current_page = random.choices(list(probability_distribution.keys()), weights=probability_distribution.values(), k=1)[0]
-    
-    # Calculate the PageRank values
-    page_rank = {page: page_visits[page] / n for page in corpus}
-    
-    return page_rank
+    # Walk over precomputed outgoing link arrays instead of rebuilding
+    # the transition model at every step
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.ranks(random_walk(graph, damping_factor, n))
 
 def iterate_pagerank(corpus, damping_factor):
     """
@@ -133,7 +121,7 @@ def iterate_pagerank(corpus, damping_factor):
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    corpus = crawler.crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (damping factor = {DAMPING}, samples = {SAMPLES})")
     for page in sorted(ranks):
@@ -142,5 +130,15 @@ def main():
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    graph = LinkGraph.from_corpus(corpus)
+    ranks = graph.ranks(power_iteration(graph, DAMPING))
+    print(f"PageRank Results from Sparse Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    print(f"Solver Convergence")
+    for method in METHODS:
+        _, convergence = pagerank(graph, DAMPING, method)
+        print(f"  {convergence}")
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import math
+import random
+
+import numpy as np
+
+
+def random_walk(graph, damping_factor, n, seed=None):
+    """
+    Return PageRank estimates for a LinkGraph from a single random surfer
+    visiting `n` pages, starting from a page at random.
+
+    Each step costs O(1): one uniform draw decides between following a
+    link and teleporting, and one index into the page's outgoing links
+    picks the target.
+    """
+    rng = random.Random(seed)
+    pages = len(graph)
+    indptr = memoryview(graph.indptr)
+    indices = memoryview(graph.indices)
+    visits = [0] * pages
+
+    page = rng.randrange(pages)
+    for _ in range(n):
+        visits[page] += 1
+        begin, end = indptr[page], indptr[page + 1]
+
+        # Dangling pages always jump to a page chosen from the whole corpus
+        if end > begin and rng.random() < damping_factor:
+            page = indices[begin + int(rng.random() * (end - begin))]
+        else:
+            page = rng.randrange(pages)
+
+    return np.array(visits) / n
+
+
+def parallel_walks(graph, damping_factor, n, walkers=10000, seed=None, tolerance=1e-4):
+    """
+    Return PageRank estimates for a LinkGraph from `walkers` independent
+    random surfers moved in lockstep as NumPy arrays, visiting `n` pages
+    in total.
+
+    Surfers start at random pages, which biases early visits towards the
+    uniform distribution. Each surfer has teleported at least once after
+    k steps with probability 1 - damping_factor ** k, so each first takes
+    enough uncounted steps to bring the bias of its start below
+    `tolerance`. Surfers are then capped so that each also makes at least
+    that many counted visits, keeping the burn-in at most half the work.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(graph)
+    degree = graph.out_degree()
+    burn_in = math.ceil(math.log(tolerance) / math.log(damping_factor)) if 0 < damping_factor < 1 else 0
+    walkers = max(1, min(walkers, n // max(burn_in, 1)))
+    visits = np.zeros(pages, dtype=np.int64)
+
+    def step(state):
+        follow = (rng.random(walkers) < damping_factor) & (degree[state] > 0)
+        offset = (rng.random(walkers) * degree[state]).astype(np.int64)
+        target = rng.integers(pages, size=walkers)
+        target[follow] = graph.indices[graph.indptr[state[follow]] + offset[follow]]
+        return target
+
+    state = rng.integers(pages, size=walkers)
+    for _ in range(burn_in):
+        state = step(state)
+
+    # Visited pages are buffered and counted a block of steps at a time
+    block = max(1, 2 ** 20 // walkers)
+    buffer = np.empty((block, walkers), dtype=np.int64)
+    filled = 0
+
+    remaining = n
+    while remaining > 0:
+        buffer[filled] = state
+        filled += 1
+        if filled == block or remaining <= walkers:
+            counted = buffer[:filled].reshape(-1)
+            if remaining < walkers:
+                counted = counted[:len(counted) - walkers + remaining]
+            visits += np.bincount(counted, minlength=pages)
+            filled = 0
+        remaining -= walkers
+        state = step(state)
+
+    return visits / n
+
+
+def personalized_walks(graph, damping_factor, source, walks=100000, seed=None):
+    """
+    Return a Monte Carlo estimate of the personalized PageRank vector of
+    a LinkGraph that teleports back to page id `source`.
+
+    `walks` surfers start at `source` and, at every step, stop with
+    probability `1 - damping_factor` or else follow a random link, going
+    back to `source` from dangling pages. The distribution of the pages
+    they stop at is the estimate.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(graph)
+    degree = graph.out_degree()
+    stops = np.zeros(pages, dtype=np.int64)
+
+    state = np.full(walks, source, dtype=np.int64)
+    while len(state):
+        stopping = rng.random(len(state)) >= damping_factor
+        stops += np.bincount(state[stopping], minlength=pages)
+        state = state[~stopping]
+
+        follow = degree[state] > 0
+        offset = (rng.random(len(state)) * degree[state]).astype(np.int64)
+        target = np.full(len(state), source, dtype=np.int64)
+        target[follow] = graph.indices[graph.indptr[state[follow]] + offset[follow]]
+        state = target
+
+    return stops / walks